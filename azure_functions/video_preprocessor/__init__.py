@@ -1,16 +1,28 @@
-import json
+import concurrent.futures
+import glob
 import logging
 import os
+import subprocess
 import tempfile
+import threading
 import time
 import uuid
 from typing import List, Dict, Any
 
 import azure.functions as func
 import cv2
+import orjson
+import requests
+from azure.core.pipeline.transport import RequestsTransport
+from requests.adapters import HTTPAdapter
 from azure.storage.blob import BlobServiceClient, ContentSettings
 from azure.eventhub import EventHubProducerClient, EventData
 
+# OpenCV 4.7 cannot decode straight from memory, so the next best thing is
+# keeping intermediate files in a tmpfs ramdisk instead of physical disk
+SCRATCH_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+
 def main(myblob: func.InputStream):
     """Azure Function triggered by blob creation to preprocess videos
     
@@ -23,19 +35,33 @@ def main(myblob: func.InputStream):
         # Extract video information
         blob_name = myblob.name
         container_name = os.environ.get('RAW_VIDEOS_CONTAINER', 'raw-footage')
+        segment_duration_seconds = int(os.environ.get('SEGMENT_DURATION_SECONDS', '120'))
         video_id = str(uuid.uuid4())
         
         logging.info(f"Processing video {video_id}: {blob_name} from {container_name}")
         
         # Save blob content to temporary file
-        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as temp_file:
+        with tempfile.NamedTemporaryFile(dir=SCRATCH_DIR, suffix='.mp4', delete=False) as temp_file:
             temp_file.write(myblob.read())
             temp_file_path = temp_file.name
         
         try:
             # Initialize blob storage client
+            # Mount adapters sized for 8 upload threads x 8 chunk connections
+            # each, so parallel segment uploads don't exhaust the default
+            # 10-connection pool ("connection pool is full" warnings); the
+            # transport itself ignores pool sizing kwargs, so the session has
+            # to bring its own adapters
+            # max_single_put_size lets segments below 64 MiB go out as one PUT
+            # instead of the default chunked block upload
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
             blob_service_client = BlobServiceClient.from_connection_string(
-                os.environ["AZURE_STORAGE_CONNECTION_STRING"]
+                os.environ["AZURE_STORAGE_CONNECTION_STRING"],
+                transport=RequestsTransport(session=session),
+                max_single_put_size=64 * 1024 * 1024
             )
             
             # Get destination container
@@ -45,44 +71,64 @@ def main(myblob: func.InputStream):
 
             if not destination_container_client.exists():
                 destination_container_client.create_container()
-            
+
+            account_url_prefix = f"https://{blob_service_client.account_name}.blob.core.windows.net/{destination_container_name}"
+
             # Split video into segments
             segments = split_video_into_segments(
                 temp_file_path,
-                int(os.environ.get('SEGMENT_DURATION_SECONDS', '120')),
+                segment_duration_seconds,
                 video_id
             )
             
-            # Upload segments
+            # Upload segments in parallel; each upload also transfers its chunks
+            # concurrently via max_concurrency
             segment_metadata = []
-            for segment_path, segment_number, start_frame in segments:
+            metadata_lock = threading.Lock()
+
+            def upload_segment(blob_client, segment_path, segment_number, start_frame):
                 # Extract the filename from the path
                 segment_filename = os.path.basename(segment_path)
-                
+
                 # Upload segment
                 with open(segment_path, 'rb') as segment_file:
-                    blob_client = destination_container_client.get_blob_client(segment_filename)
                     blob_client.upload_blob(
                         segment_file,
+                        length=os.path.getsize(segment_path),
                         overwrite=True,
+                        max_concurrency=8,
                         content_settings=ContentSettings(content_type='video/mp4')
                     )
-                
+
                 # Add to metadata list
-                segment_metadata.append({
-                    'segment_id': str(uuid.uuid4()),
-                    'video_id': video_id,
-                    'segment_number': segment_number,
-                    'start_frame': start_frame,
-                    'blob_name': segment_filename,
-                    'container_name': destination_container_name,
-                    'start_time': (segment_number - 1) * int(os.environ.get('SEGMENT_DURATION_SECONDS', '120')),
-                    'duration': int(os.environ.get('SEGMENT_DURATION_SECONDS', '120')),
-                    'url': f"https://{blob_service_client.account_name}.blob.core.windows.net/{destination_container_name}/{segment_filename}"
-                })
-                
+                with metadata_lock:
+                    segment_metadata.append({
+                        'segment_id': str(uuid.uuid4()),
+                        'video_id': video_id,
+                        'segment_number': segment_number,
+                        'start_frame': start_frame,
+                        'blob_name': segment_filename,
+                        'container_name': destination_container_name,
+                        'start_time': (segment_number - 1) * segment_duration_seconds,
+                        'duration': segment_duration_seconds,
+                        'url': f"{account_url_prefix}/{segment_filename}"
+                    })
+
                 # Clean up segment file
                 os.unlink(segment_path)
+
+            # Build all blob clients up-front so they share the container client's
+            # transport instead of allocating fresh state per upload
+            upload_jobs = [
+                (destination_container_client.get_blob_client(os.path.basename(segment_path)),
+                 segment_path, segment_number, start_frame)
+                for segment_path, segment_number, start_frame in segments
+            ]
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+                futures = [executor.submit(upload_segment, *job) for job in upload_jobs]
+                for future in concurrent.futures.as_completed(futures):
+                    future.result()
             
             # Send segments metadata to Event Hub
             send_to_event_hub(segment_metadata)
@@ -100,82 +146,73 @@ def main(myblob: func.InputStream):
 
 
 def split_video_into_segments(video_path: str, segment_duration_seconds: int, video_id: str) -> List[tuple]:
-    """Split a video into segments of specified duration
-    
+    """Split a video into segments of specified duration without re-encoding
+
     Args:
         video_path (str): Path to the video file
         segment_duration_seconds (int): Duration of each segment in seconds
         video_id (str): ID of the original video
-        
+
     Returns:
         List[tuple]: List of (segment_path, segment_number, start_frame) tuples
     """
     logging.info(f"Splitting video into {segment_duration_seconds}-second segments")
-    
-    # Open the video
+
+    # Open the video only to read its properties
     cap = cv2.VideoCapture(video_path)
-    
+
     # Check if video opened successfully
     if not cap.isOpened():
         raise Exception("Error opening video file")
-    
+
     # Get video properties
     fps = cap.get(cv2.CAP_PROP_FPS)
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    
+    cap.release()
+
     logging.info(f"Video properties: {fps} fps, {width}x{height}, {total_frames} frames")
-    
+
     # Calculate frames per segment
     frames_per_segment = int(fps * segment_duration_seconds)
-    
+
     # Create temporary directory for segments
-    temp_dir = tempfile.mkdtemp()
-    
+    temp_dir = tempfile.mkdtemp(dir=SCRATCH_DIR)
+
+    # Stream-copy split: the input is already H.264 MP4 and segment boundaries are
+    # purely temporal, so ffmpeg just rewrites containers - no decode, no encode.
+    # Boundaries snap to the nearest keyframe after each segment_time mark; when
+    # exact durations matter more than encode cost, SEGMENT_EXACT_BOUNDARIES=1
+    # re-encodes in the same single process (one decode, encoder on all cores).
+    if os.environ.get('SEGMENT_EXACT_BOUNDARIES', '0') == '1':
+        codec_args = ['-c:v', 'libx264', '-preset', 'ultrafast', '-threads', '0']
+    else:
+        codec_args = ['-c', 'copy']
+
+    subprocess.run(
+        [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-i', video_path
+        ] + codec_args + [
+            '-map', '0',
+            '-f', 'segment',
+            '-segment_time', str(segment_duration_seconds),
+            '-reset_timestamps', '1',
+            os.path.join(temp_dir, f"{video_id}_part%06d.mp4")
+        ],
+        check=True
+    )
+
+    # Rename outputs so the filename carries the segment's start frame, which
+    # downstream consumers parse out of the blob name
     segments = []
-    segment_number = 1
-    current_segment_path = None
-    out = None
-    frame_count = 0
-    
-    try:
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Start a new segment if needed
-            if frame_count % frames_per_segment == 0:
-                # Close previous writer if exists
-                if out is not None:
-                    out.release()
-                
-                # Create new output file with frame number in filename
-                segment_start_frame = frame_count
-                current_segment_path = os.path.join(
-                    temp_dir, 
-                    f"{video_id}_{segment_start_frame:06d}.mp4"
-                )
-                
-                # Create VideoWriter object
-                fourcc = cv2.VideoWriter_fourcc(*'mp4v')  # codec
-                out = cv2.VideoWriter(current_segment_path, fourcc, fps, (width, height))
-                
-                # Add to segments list with start frame information
-                segments.append((current_segment_path, segment_number, segment_start_frame))
-                segment_number += 1
-            
-            # Write the frame
-            out.write(frame)
-            frame_count += 1
-    
-    finally:
-        # Release resources
-        if out is not None:
-            out.release()
-        cap.release()
-    
+    for segment_number, part_path in enumerate(sorted(glob.glob(os.path.join(temp_dir, f"{video_id}_part*.mp4"))), start=1):
+        segment_start_frame = (segment_number - 1) * frames_per_segment
+        segment_path = os.path.join(temp_dir, f"{video_id}_{segment_start_frame:06d}.mp4")
+        os.rename(part_path, segment_path)
+        segments.append((segment_path, segment_number, segment_start_frame))
+
     logging.info(f"Created {len(segments)} video segments")
     return segments
 
@@ -210,8 +247,8 @@ def send_to_event_hub(segment_metadata: List[Dict[str, Any]]) -> None:
             event_data_batch = producer.create_batch()
             
             for segment in segment_metadata:
-                # Convert segment metadata to JSON
-                segment_json = json.dumps(segment)
+                # Convert segment metadata to JSON (orjson emits bytes directly)
+                segment_json = orjson.dumps(segment)
                 
                 # Create event data
                 event_data = EventData(segment_json)
@@ -1,56 +1,119 @@
 import uuid
-import math
+
+import numpy as np
+
+# Numba compiles the quadratic matching loop to machine code; pure NumPy/Python
+# is used as a fallback when it is not installed
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def match_greedy(new_centers, old_centers, max_distance):
+    """
+    Greedily match each new detection to the nearest not-yet-used tracked object.
+
+    Works on squared distances so no square root is needed.
+
+    Args:
+        new_centers (ndarray): (M, 2) float32 centers of the new detections
+        old_centers (ndarray): (N, 2) float32 centers of the tracked objects
+        max_distance (float): Maximum matching distance in pixels
+
+    Returns:
+        ndarray: (M,) int32 array of indices into old_centers, -1 for unmatched
+    """
+    num_new = new_centers.shape[0]
+    num_old = old_centers.shape[0]
+    matches = np.full(num_new, -1, np.int32)
+    used = np.zeros(num_old, np.bool_)
+    max_sq = max_distance * max_distance
+    for i in range(num_new):
+        best = -1
+        best_sq = max_sq
+        for j in range(num_old):
+            if used[j]:
+                continue
+            dx = new_centers[i, 0] - old_centers[j, 0]
+            dy = new_centers[i, 1] - old_centers[j, 1]
+            dist_sq = dx * dx + dy * dy
+            if dist_sq <= best_sq:
+                best_sq = dist_sq
+                best = j
+        if best >= 0:
+            used[best] = True
+            matches[i] = best
+    return matches
+
+
+if NUMBA_AVAILABLE:
+    match_greedy = njit(cache=True, fastmath=True)(match_greedy)
 
 
 class Tracker:
     def __init__(self, max_distance_pixels=35):
         """
         Initialize the detected objects tracker.
-        
+
         Args:
-            max_distance (int): Maximum distance in pixels between detected object centers 
+            max_distance (int): Maximum distance in pixels between detected object centers
                                 for them to be considered the same object across frames
         """
-        self.center_points = {}
+        self.ids = []
+        self.labels = []
+        self.centers = np.empty((0, 2), dtype=np.float32)
         self.max_distance_pixels = max_distance_pixels
 
 
-    def update(self, objects_bboxes):
+    def update(self, objects_bboxes, labels):
         """
         Update the tracker with new detections.
-        
+
         Args:
             objects_bboxes (list): List of [x1, y1, x2, y2] coordinates of the detected objects bounding boxes
-        
+            labels (list): Class label per detection (e.g. "CAR" or "TRUCK")
+
         Returns:
-            list: List of [x1, y1, x2, y2, object_id] for each tracked object
+            list: List of [x1, y1, x2, y2, object_id, label] for each tracked object
         """
+        new_centers = np.asarray(
+            [((x1 + x2) // 2, (y1 + y2) // 2) for x1, y1, x2, y2 in objects_bboxes],
+            dtype=np.float32
+        ).reshape(-1, 2)
+
+        # One compiled pass handles all the pairwise distances and the greedy matching
+        if len(self.ids) and len(objects_bboxes):
+            matches = match_greedy(new_centers, self.centers, float(self.max_distance_pixels))
+        else:
+            matches = None
+
         objects_bboxes_ids = []
-        for bbox in objects_bboxes:
+        new_ids = []
+        new_labels = []
+        for i, bbox in enumerate(objects_bboxes):
             x1, y1, x2, y2 = bbox
-            cx = (x1 + x2) // 2
-            cy = (y1 + y2) // 2
-
-            same_object_detected = False
-            for obj_id, center in self.center_points.items():
-                dist = math.hypot(cx - center[0], cy - center[1])
-                if dist <= self.max_distance_pixels:
-                    self.center_points[obj_id] = (cx, cy)
-                    objects_bboxes_ids.append([x1, y1, x2, y2, obj_id])
-                    same_object_detected = True
-                    break
-
-            if not same_object_detected:
-                new_id = str(uuid.uuid4())
-                self.center_points[new_id] = (cx, cy)
-                objects_bboxes_ids.append([x1, y1, x2, y2, new_id])
-
-        # Clean the dictionary from objects not detected anymore
-        new_center_points = {}
-        for obj_bbox_id in objects_bboxes_ids:
-            _, _, _, _, obj_id = obj_bbox_id
-            center = self.center_points[obj_id]
-            new_center_points[obj_id] = center
-
-        self.center_points = new_center_points
+
+            obj_id = None
+            label = labels[i]
+            if matches is not None and matches[i] >= 0:
+                j = int(matches[i])
+                obj_id = self.ids[j]
+                # Keep the label from the first detection so a vehicle never flips class
+                label = self.labels[j]
+
+            if obj_id is None:
+                # IDs leave the process (alerts, vehicle_events.vehicle_id UUID),
+                # so they must be UUIDs unique across segments, not a counter
+                obj_id = str(uuid.uuid4())
+
+            new_ids.append(obj_id)
+            new_labels.append(label)
+            objects_bboxes_ids.append([x1, y1, x2, y2, obj_id, label])
+
+        # Objects not detected anymore are dropped by keeping this frame's entries only
+        self.ids = new_ids
+        self.labels = new_labels
+        self.centers = new_centers
         return objects_bboxes_ids
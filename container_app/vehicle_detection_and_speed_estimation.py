@@ -1,12 +1,16 @@
 import os
 import cv2
 import json
+import uuid
+import asyncio
 import logging
-import psycopg2
-import pandas as pd
+import orjson
+import psycopg
+import numpy as np
+from decimal import Decimal
 from ultralytics import YOLO
-from psycopg2.extras import execute_values
-from azure.eventhub import EventHubConsumerClient, EventHubProducerClient, EventData
+from azure.eventhub import EventHubConsumerClient, EventData
+from azure.eventhub.aio import EventHubProducerClient
 from azure.eventhub.extensions.checkpointstoreblob import BlobCheckpointStore
 from azure.storage.blob import generate_blob_sas, BlobSasPermissions
 from datetime import datetime, timezone, timedelta
@@ -15,6 +19,19 @@ from tracker import Tracker
 from dotenv import load_dotenv
 load_dotenv()
 
+try:
+    import torch
+    TORCH_CUDA_AVAILABLE = torch.cuda.is_available()
+except ImportError:
+    TORCH_CUDA_AVAILABLE = False
+
+# ffmpegcv offloads H.264 decoding to the GPU (NVDEC); fall back to cv2 if unavailable
+try:
+    import ffmpegcv
+    FFMPEGCV_AVAILABLE = True
+except ImportError:
+    FFMPEGCV_AVAILABLE = False
+
 logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s', 
     datefmt='%Y-%m-%d %H:%M:%S',
@@ -23,13 +40,31 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Read once at import; these are needed again for every processed segment
+EVENT_HUB_CONNECTION_STRING = os.getenv("EVENT_HUB_CONNECTION_STRING")
+ALERTS_EVENT_HUB_NAME = os.getenv("ALERTS_EVENT_HUB_NAME")
+STORAGE_ACCOUNT_KEY = os.getenv("STORAGE_ACCOUNT_KEY")
+
 FRAME_PROCESSING_INTERVAL = 2
+INFERENCE_BATCH_SIZE = 8
+# 480 is plenty for highway-scale vehicles and cuts the forward pass cost
+# roughly quadratically versus the default 640
+YOLO_IMAGE_SIZE = 480
+
+# Bounds the decode stage's lead over inference (in batches) so frames don't
+# pile up in memory, and how long alerts may sit in a partial batch
+FRAME_QUEUE_MAX_BATCHES = 4
+ALERT_FLUSH_SECONDS = 2.0
 OFFSET_RANGE = 15
 DISTANCE_BETWEEN_LINES_METERS = 20
 SPEED_LIMIT_KMH = 130
 SECONDS_PER_MINUTE = 60
 MINUTES_PER_BIN = 5
 
+# COCO dataset class indices for car and truck
+CAR_CLASS = 2
+TRUCK_CLASS = 7
+
 TOP_LINE_Y = 375
 TOP_LINE_X_START = 380
 TOP_LINE_X_END = 873
@@ -43,6 +78,45 @@ GREEN_COLOR = (0, 255, 0)
 BLACK_COLOR = (0, 0, 0)
 
 
+MODEL_WEIGHTS = 'yolov8s.pt'
+MODEL_ENGINE = 'yolov8s.engine'
+
+_model = None
+
+def get_model():
+    """
+    Load the YOLO model once per container lifetime and reuse it across segments.
+
+    A pre-exported FP16 TensorRT engine (see export_engine) is preferred when it
+    exists and CUDA is available; otherwise the PyTorch weights are loaded.
+
+    Returns:
+        YOLO: The cached detection model
+    """
+    global _model
+    if _model is None:
+        if TORCH_CUDA_AVAILABLE and os.path.exists(MODEL_ENGINE):
+            logger.info(f"Loading TensorRT engine: {MODEL_ENGINE}")
+            model = YOLO(MODEL_ENGINE)
+        else:
+            model = YOLO(MODEL_WEIGHTS)
+            model.fuse()  # Fold Conv+BatchNorm pairs once so every frame pays less
+        # Warm up on a dummy frame so CUDA init happens here, not on the first real frame
+        model.predict(np.zeros((YOLO_IMAGE_SIZE, YOLO_IMAGE_SIZE, 3), dtype=np.uint8), verbose=False)
+        _model = model
+    return _model
+
+
+def export_engine():
+    """
+    One-time export of the FP16 TensorRT engine that get_model prefers.
+
+    Engines are device-specific, so run this once on the target GPU:
+        python -c "from vehicle_detection_and_speed_estimation import export_engine; export_engine()"
+    """
+    YOLO(MODEL_WEIGHTS).export(format='engine', half=True, imgsz=YOLO_IMAGE_SIZE, device=0)
+
+
 def extract_from_url(url):
     """
     Extract video ID and starting frame from the video URL.
@@ -79,7 +153,7 @@ def authorize_segment_url(url):
         account_name=storage_account,
         container_name=container_name,
         blob_name=blob_name,
-        account_key=os.getenv("STORAGE_ACCOUNT_KEY"),
+        account_key=STORAGE_ACCOUNT_KEY,
         permission=BlobSasPermissions(read=True),
         expiry=datetime.now(timezone.utc) + timedelta(minutes=10)
     )
@@ -87,6 +161,37 @@ def authorize_segment_url(url):
     return f"{url}?{sas_token}"
 
 
+def open_video_capture(url, visualize=False):
+    """
+    Open a capture for the video URL, preferring GPU (NVDEC) decoding when available.
+
+    Frames are decoded on dedicated NVDEC hardware at the source resolution and
+    handed back as regular BGR numpy arrays, so decoding no longer competes with
+    YOLO for CPU, predict() consumes them like any cv2 frame, and the line
+    coordinates calibrated in source pixels apply unchanged. The NVDEC path is
+    skipped when visualizing so the interactive path stays on the plain cv2
+    capture.
+
+    Args:
+        url (str): Authorized URL to the video
+        visualize (bool): Whether visualization is enabled
+
+    Returns:
+        tuple: (capture, fps, use_gpu_decode)
+    """
+    if not visualize and FFMPEGCV_AVAILABLE and TORCH_CUDA_AVAILABLE:
+        try:
+            cap = ffmpegcv.VideoCaptureNV(url)
+            return cap, cap.fps, True
+        except Exception as e:
+            logger.warning(f"NVDEC decoding unavailable, falling back to CPU decode: {e}")
+
+    cap = cv2.VideoCapture(url)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video file: {url}")
+    return cap, cap.get(cv2.CAP_PROP_FPS), False
+
+
 def calculate_five_min_bin(absolute_frame, fps):
     """
     Calculate which 5-minute bin the frame belongs to.
@@ -132,28 +237,41 @@ def calculate_speed(elapsed_frames, fps):
     return speed_mps * 3.6  # Convert m/s to km/h
 
 
+_overlay = None
+_overlay_mask = None
+
 def draw_visualization(frame, num_of_vehicles_going_up, num_of_vehicles_going_down):
     """
     Add visualization elements to the frame.
-    
+
+    The counting lines never move, so they are rasterized once into a cached
+    overlay that is copied onto each frame; only the counter text changes and
+    gets re-rendered per frame.
+
     Args:
         frame: The video frame to draw on
         num_of_vehicles_going_up (int): The number of vehicles going up
         num_of_vehicles_going_down (int): The number of vehicles going down
     """
-    cv2.line(frame, (TOP_LINE_X_START, TOP_LINE_Y), (TOP_LINE_X_END, TOP_LINE_Y), BLUE_COLOR, thickness=3)
-    cv2.line(frame, (BOTTOM_LINE_X_START, BOTTOM_LINE_Y), (BOTTOM_LINE_X_END, BOTTOM_LINE_Y), BLUE_COLOR, thickness=3)
+    global _overlay, _overlay_mask
+    if _overlay is None or _overlay.shape != frame.shape:
+        _overlay = np.zeros_like(frame)
+        cv2.line(_overlay, (TOP_LINE_X_START, TOP_LINE_Y), (TOP_LINE_X_END, TOP_LINE_Y), BLUE_COLOR, thickness=3)
+        cv2.line(_overlay, (BOTTOM_LINE_X_START, BOTTOM_LINE_Y), (BOTTOM_LINE_X_END, BOTTOM_LINE_Y), BLUE_COLOR, thickness=3)
+        _overlay_mask = _overlay.any(-1)
 
-    cv2.putText(frame, f'Going Up - {num_of_vehicles_going_up}', (10, 60), 
+    frame[_overlay_mask] = _overlay[_overlay_mask]
+
+    cv2.putText(frame, f'Going Up - {num_of_vehicles_going_up}', (10, 60),
                cv2.FONT_HERSHEY_SIMPLEX, 0.5, BLACK_COLOR, 1, cv2.LINE_AA)
-    cv2.putText(frame, f'Going Down - {num_of_vehicles_going_down}', (10, 30), 
+    cv2.putText(frame, f'Going Down - {num_of_vehicles_going_down}', (10, 30),
                cv2.FONT_HERSHEY_SIMPLEX, 0.5, BLACK_COLOR, 1, cv2.LINE_AA)
 
 
-def send_speeding_alert(vehicle_id, vehicle_type, direction, speed_kmh, absolute_frame, video_id, alert_producer):
+def send_speeding_alert(vehicle_id, vehicle_type, direction, speed_kmh, absolute_frame, video_id, alert_queue):
     """
-    Send a speeding alert to the alerts Event Hub.
-    
+    Hand a speeding alert to the publisher stage, which batches and sends it to Event Hub.
+
     Args:
         vehicle_id (uuid): ID of the vehicle
         vehicle_type (str): Type of vehicle (CAR or TRUCK)
@@ -161,7 +279,7 @@ def send_speeding_alert(vehicle_id, vehicle_type, direction, speed_kmh, absolute
         speed_kmh (float): Speed in km/h
         absolute_frame (int): Absolute frame number with respect to the original video
         video_id (str): Identifier for the video source
-        alert_producer (EventHubProducerClient): Client for sending speeding alerts to Event Hub
+        alert_queue (asyncio.Queue): Queue consumed by the alert publisher stage
     """
     alert_data = {
         "vehicle_id": vehicle_id,
@@ -173,20 +291,19 @@ def send_speeding_alert(vehicle_id, vehicle_type, direction, speed_kmh, absolute
         "absolute_frame": absolute_frame,
         "video_id": video_id
     }
-    alert_json = json.dumps(alert_data)
-
-    event_data_batch = alert_producer.create_batch()
-    event_data_batch.add(EventData(alert_json))
-    alert_producer.send_batch(event_data_batch)
+    alert_queue.put_nowait(alert_data)
 
     logger.info(f"SPEED ALERT: {vehicle_type} {vehicle_id} - Lane {direction} - Speed {speed_kmh:.2f} km/h - Excess: {speed_kmh - SPEED_LIMIT_KMH:.2f} km/h")
 
 
-def process_vehicle(bbox_id, vehicle_type, absolute_frame, fps, video_id, crossed_top_line, processed_up, 
-                    crossed_bottom_line, processed_down, events, alert_producer, frame, visualize=True):
+def process_vehicle(bbox_id, vehicle_type, absolute_frame, fps, video_id, crossed_top_line, processed_up,
+                    crossed_bottom_line, processed_down, events, alert_queue):
     """
     Process a single tracked vehicle and produce an event if it crossed the lines.
-    
+
+    This is the production variant with no drawing code; use process_vehicle_viz
+    when visualization is enabled.
+
     Args:
         bbox_id: Bounding box and ID of the vehicle
         vehicle_type (str): Type of vehicle (CAR or TRUCK)
@@ -198,16 +315,11 @@ def process_vehicle(bbox_id, vehicle_type, absolute_frame, fps, video_id, crosse
         crossed_bottom_line (dict): Dictionary tracking vehicles crossing the bottom line
         processed_down (set): Set of vehicle IDs going down
         events (list): List to append the produced events to
-        alert_producer (EventHubProducerClient): Client for sending speeding alerts to Event Hub
-        frame: The video frame to draw on
-        visualize (bool): Whether to draw visualizations
+        alert_queue (asyncio.Queue): Queue consumed by the alert publisher stage
     """
     x1, y1, x2, y2, obj_id = bbox_id
-    cx = (x1 + x2) // 2
     cy = (y1 + y2) // 2
 
-    color = GREEN_COLOR if vehicle_type == "TRUCK" else RED_COLOR
-
     five_min_bin = calculate_five_min_bin(absolute_frame, fps)
 
     # Going UP detection
@@ -219,15 +331,11 @@ def process_vehicle(bbox_id, vehicle_type, absolute_frame, fps, video_id, crosse
         speed_kmh = calculate_speed(absolute_frame - crossed_bottom_line[obj_id], fps)
 
         if speed_kmh > SPEED_LIMIT_KMH:
-            send_speeding_alert(obj_id, vehicle_type, "UP", speed_kmh, absolute_frame, video_id, alert_producer)
+            send_speeding_alert(obj_id, vehicle_type, "UP", speed_kmh, absolute_frame, video_id, alert_queue)
 
         events.append((obj_id, vehicle_type, "UP", speed_kmh, five_min_bin, video_id))
         logger.info(f'EVENT: {vehicle_type} {obj_id} - Lane UP - Speed {speed_kmh:.2f} km/h - Bin {five_min_bin}')
 
-        if visualize:
-            cv2.circle(frame, (cx, cy), 4, color, -1)
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-
     # Going DOWN detection
     if obj_id not in crossed_top_line and is_crossing_line(cy, TOP_LINE_Y):
         crossed_top_line[obj_id] = absolute_frame
@@ -237,53 +345,252 @@ def process_vehicle(bbox_id, vehicle_type, absolute_frame, fps, video_id, crosse
         speed_kmh = calculate_speed(absolute_frame - crossed_top_line[obj_id], fps)
 
         if speed_kmh > SPEED_LIMIT_KMH:
-            send_speeding_alert(obj_id, vehicle_type, "DOWN", speed_kmh, absolute_frame, video_id, alert_producer)
+            send_speeding_alert(obj_id, vehicle_type, "DOWN", speed_kmh, absolute_frame, video_id, alert_queue)
 
         events.append((obj_id, vehicle_type, "DOWN", speed_kmh, five_min_bin, video_id))
         logger.info(f'EVENT: {vehicle_type} {obj_id} - Lane DOWN - Speed {speed_kmh:.2f} km/h - Bin {five_min_bin}')
 
-        if visualize:
-            cv2.circle(frame, (cx, cy), 4, color, -1)
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+
+def process_vehicle_viz(bbox_id, vehicle_type, absolute_frame, fps, video_id, crossed_top_line, processed_up,
+                        crossed_bottom_line, processed_down, events, alert_queue, frame):
+    """
+    Visualization variant of process_vehicle that also marks crossing vehicles on the frame.
+
+    Args:
+        Same as process_vehicle, plus:
+        frame: The video frame to draw on
+    """
+    events_before = len(events)
+    process_vehicle(bbox_id, vehicle_type, absolute_frame, fps, video_id, crossed_top_line,
+                    processed_up, crossed_bottom_line, processed_down, events, alert_queue)
+
+    # Draw only when this vehicle produced a crossing event
+    if len(events) > events_before:
+        x1, y1, x2, y2, _ = bbox_id
+        cx = (x1 + x2) // 2
+        cy = (y1 + y2) // 2
+        color = GREEN_COLOR if vehicle_type == "TRUCK" else RED_COLOR
+        cv2.circle(frame, (cx, cy), 4, color, -1)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+
+
+async def decode_frames(cap, use_gpu_decode, starting_frame, frame_queue, stop_event):
+    """
+    Pipeline stage 1: decode sampled frames and feed batches to the inference stage.
+
+    The blocking decode calls run in a worker thread so the event loop stays free
+    for the publisher's network I/O; the bounded queue keeps decoding from running
+    arbitrarily far ahead of inference and blowing out memory.
+
+    Args:
+        cap: Open video capture (cv2 or ffmpegcv)
+        use_gpu_decode (bool): Whether cap is the NVDEC capture
+        starting_frame (int): First frame number of the segment in the original video
+        frame_queue (asyncio.Queue): Queue of (frames, absolute_frames) batches
+        stop_event (asyncio.Event): Set when processing should stop early
+    """
+    segment_frame_count = 0
+
+    def next_batch():
+        nonlocal segment_frame_count
+        frames = []
+        abs_frames = []
+        while len(frames) < INFERENCE_BATCH_SIZE:
+            if use_gpu_decode:
+                # NVDEC decodes on dedicated hardware, so just read and drop skipped frames
+                ret, frame = cap.read()
+                if not ret:
+                    return frames, abs_frames, True
+                segment_frame_count += 1
+                if segment_frame_count % FRAME_PROCESSING_INTERVAL != 0:
+                    continue
+            else:
+                # grab() only advances the stream; the expensive decode happens in retrieve(),
+                # which we skip for frames that are not sent to the model anyway
+                if not cap.grab():
+                    return frames, abs_frames, True
+                segment_frame_count += 1
+                if segment_frame_count % FRAME_PROCESSING_INTERVAL != 0:
+                    continue
+                ret, frame = cap.retrieve()
+                if not ret:
+                    return frames, abs_frames, True
+
+            frames.append(frame)
+            # Absolute frame is the frame number with respect to the original video
+            abs_frames.append(starting_frame + segment_frame_count)
+        return frames, abs_frames, False
+
+    while not stop_event.is_set():
+        frames, abs_frames, end_of_stream = await asyncio.to_thread(next_batch)
+        if frames:
+            await frame_queue.put((frames, abs_frames))
+        if end_of_stream:
+            break
+
+    # Tell the inference stage no more frames are coming
+    await frame_queue.put(None)
+
+
+async def run_inference(model, vehicle_classes, fps, video_id, tracker, crossed_top_line, crossed_bottom_line,
+                        processed_up, processed_down, events, frame_queue, alert_queue, stop_event, visualize):
+    """
+    Pipeline stage 2: run batched YOLO on decoded frames and turn detections into events.
+
+    Args:
+        model (YOLO): The detection model
+        vehicle_classes (list): COCO class indices to detect
+        fps (float): Frames per second of the video
+        video_id (str): Identifier for the video source
+        tracker (Tracker): Tracker shared across the whole segment
+        crossed_top_line (dict): Dictionary tracking vehicles crossing the top line
+        crossed_bottom_line (dict): Dictionary tracking vehicles crossing the bottom line
+        processed_up (set): Set of vehicle IDs going up
+        processed_down (set): Set of vehicle IDs going down
+        events (list): List to append the produced events to
+        frame_queue (asyncio.Queue): Queue of (frames, absolute_frames) batches
+        alert_queue (asyncio.Queue): Queue consumed by the alert publisher stage
+        stop_event (asyncio.Event): Set when processing should stop early
+    """
+    while True:
+        item = await frame_queue.get()
+        if item is None:
+            break
+        # After an early quit, keep draining so the decode stage can never be
+        # left blocked on a full queue
+        if stop_event.is_set():
+            continue
+        pending_frames, pending_abs_frames = item
+
+        # One batched forward pass amortizes per-call overhead and keeps the GPU
+        # busier than single-frame predicts; run in a thread so the loop stays free
+        results = await asyncio.to_thread(
+            model.predict, pending_frames, classes=vehicle_classes, verbose=False, imgsz=YOLO_IMAGE_SIZE
+        )
+
+        for result, absolute_frame, frame in zip(results, pending_abs_frames, pending_frames):
+            detections = result.boxes.data.cpu().numpy()
+
+            # predict() already restricts classes, so every detection is a car or truck
+            detected_classes = detections[:, 5].astype(np.int32)
+            vehicles_rect = detections[:, :4].astype(np.int32).tolist()
+            vehicle_labels = np.where(detected_classes == CAR_CLASS, "CAR", "TRUCK").tolist()
+
+            # The visualize branch is hoisted out of the per-vehicle loop so the
+            # production path runs the drawing-free variant unconditionally
+            bboxes_ids = tracker.update(vehicles_rect, vehicle_labels)
+            if visualize:
+                for bbox_id in bboxes_ids:
+                    process_vehicle_viz(bbox_id[:5], bbox_id[5], absolute_frame, fps, video_id,
+                                        crossed_top_line, processed_up, crossed_bottom_line,
+                                        processed_down, events, alert_queue, frame)
+            else:
+                for bbox_id in bboxes_ids:
+                    process_vehicle(bbox_id[:5], bbox_id[5], absolute_frame, fps, video_id,
+                                    crossed_top_line, processed_up, crossed_bottom_line,
+                                    processed_down, events, alert_queue)
+
+            if visualize:
+                draw_visualization(frame, len(processed_up), len(processed_down))
+                cv2.imshow('Vehicle Tracking', frame)
+
+                # Exit on 'q' press
+                if cv2.waitKey(15) & 0xFF == ord('q'):
+                    stop_event.set()
+                    break
+
+    # Tell the publisher no more alerts are coming
+    alert_queue.put_nowait(None)
+
+
+async def publish_alerts(alert_producer, alert_queue):
+    """
+    Pipeline stage 3: batch queued alerts and publish them to Event Hub.
+
+    Alerts are flushed when the batch fills up or when ALERT_FLUSH_SECONDS pass
+    without a new alert, so the network I/O overlaps decode and inference instead
+    of stalling them.
+
+    Args:
+        alert_producer (EventHubProducerClient): Async client for the alerts Event Hub
+        alert_queue (asyncio.Queue): Queue fed by the inference stage
+    """
+    alert_batch = await alert_producer.create_batch()
+
+    while True:
+        try:
+            alert_data = await asyncio.wait_for(alert_queue.get(), timeout=ALERT_FLUSH_SECONDS)
+        except asyncio.TimeoutError:
+            # No alert for a while - flush so nothing sits in the batch indefinitely
+            if len(alert_batch) > 0:
+                await alert_producer.send_batch(alert_batch)
+                alert_batch = await alert_producer.create_batch()
+            continue
+
+        if alert_data is None:
+            break
+
+        alert_json = orjson.dumps(alert_data)
+        try:
+            alert_batch.add(EventData(alert_json))
+        except ValueError:
+            # Batch is full - send it and start a new one
+            await alert_producer.send_batch(alert_batch)
+            alert_batch = await alert_producer.create_batch()
+            alert_batch.add(EventData(alert_json))
+
+    # Flush any alerts still sitting in the batch
+    if len(alert_batch) > 0:
+        await alert_producer.send_batch(alert_batch)
 
 
 def process_video_segment(video_url, visualize=False):
     """
     Process a video from a URL and generate events for detected vehicles.
-    
+
     Args:
         video_url (str): URL to the video
         visualize (bool): Whether to show visualization windows
-    
+
     Returns:
-        list: List of JSON event strings
+        list: List of event tuples
+    """
+    return asyncio.run(process_video_segment_async(video_url, visualize))
+
+
+async def process_video_segment_async(video_url, visualize=False):
+    """
+    Async pipeline behind process_video_segment: decode, inference and alert
+    publishing run as three overlapping stages connected by bounded queues, so
+    total time approaches the slowest stage instead of the sum of all three.
+
+    Args:
+        video_url (str): URL to the video
+        visualize (bool): Whether to show visualization windows
+
+    Returns:
+        list: List of event tuples
     """
     alert_producer = EventHubProducerClient.from_connection_string(
-        conn_str=os.getenv("EVENT_HUB_CONNECTION_STRING"),
-        eventhub_name=os.getenv("ALERTS_EVENT_HUB_NAME")
+        conn_str=EVENT_HUB_CONNECTION_STRING,
+        eventhub_name=ALERTS_EVENT_HUB_NAME
     )
 
     video_id, starting_frame = extract_from_url(video_url)
     logger.info(f"Processing video segment: {video_url}")
     logger.info(f"Video ID: {video_id}, Starting Frame: {starting_frame}")
 
-    model = YOLO('yolov8s.pt')
-    vehicle_classes = [2, 7]  # COCO dataset class indices for car and truck
-    class_names = {2: "car", 7: "truck"}
+    model = get_model()
+    vehicle_classes = [CAR_CLASS, TRUCK_CLASS]
 
     video_url_with_sas = authorize_segment_url(video_url)
 
-    cap = cv2.VideoCapture(video_url_with_sas)
-    if not cap.isOpened():
-        raise ValueError(f"Could not open video file: {video_url}")
-
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    if fps == 0:
+    cap, fps, use_gpu_decode = open_video_capture(video_url_with_sas, visualize)
+    if not fps:
         raise ValueError("Could not get the frame rate of the video.")
-    logger.info(f"Video frame rate: {fps} fps")
+    logger.info(f"Video frame rate: {fps} fps (GPU decode: {use_gpu_decode})")
 
-    car_tracker = Tracker()
-    truck_tracker = Tracker()
+    tracker = Tracker()
 
     crossed_top_line = {}
     crossed_bottom_line = {}
@@ -291,77 +598,62 @@ def process_video_segment(video_url, visualize=False):
     processed_down = set()
 
     events = []
-    segment_frame_count = 0
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        segment_frame_count += 1
-
-        # Absolute frame is the frame number with respect to the original video
-        absolute_frame = starting_frame + segment_frame_count
-
-        # Detect vehicles
-        results = model.predict(frame, classes=vehicle_classes)
-        detections = results[0].boxes.data.numpy()
-        detections_df = pd.DataFrame(detections).astype('float')
-
-        cars_rect = []
-        trucks_rect = []
-        for _, row in detections_df.iterrows():
-            x1, y1, x2, y2 = int(row[0]), int(row[1]), int(row[2]), int(row[3])
-            detected_class = int(row[5])
-
-            if class_names[detected_class] == 'car':
-                cars_rect.append([x1, y1, x2, y2])
-            elif class_names[detected_class] == 'truck':
-                trucks_rect.append([x1, y1, x2, y2])
-
-        cars_bboxes_ids = car_tracker.update(cars_rect)
-        for car_bbox_id in cars_bboxes_ids:
-            process_vehicle(car_bbox_id, "CAR", absolute_frame, fps, video_id, crossed_top_line, processed_up, 
-                            crossed_bottom_line, processed_down, events, alert_producer, frame, visualize)
-
-        trucks_bboxes_ids = truck_tracker.update(trucks_rect)
-        for truck_bbox_id in trucks_bboxes_ids:
-            process_vehicle(truck_bbox_id, "TRUCK", absolute_frame, fps, video_id, crossed_top_line, processed_up, 
-                            crossed_bottom_line, processed_down, events, alert_producer, frame, visualize)
-
-        if visualize:
-            draw_visualization(frame, len(processed_up), len(processed_down))
-            cv2.imshow('Vehicle Tracking', frame)
-
-            # Exit on 'q' press
-            if cv2.waitKey(15) & 0xFF == ord('q'):
-                break
+    frame_queue = asyncio.Queue(maxsize=FRAME_QUEUE_MAX_BATCHES)
+    alert_queue = asyncio.Queue()
+    stop_event = asyncio.Event()
+
+    async with alert_producer:
+        await asyncio.gather(
+            decode_frames(cap, use_gpu_decode, starting_frame, frame_queue, stop_event),
+            run_inference(model, vehicle_classes, fps, video_id, tracker, crossed_top_line, crossed_bottom_line,
+                          processed_up, processed_down, events, frame_queue, alert_queue, stop_event, visualize),
+            publish_alerts(alert_producer, alert_queue),
+        )
 
     cap.release()
     if visualize:
         cv2.destroyAllWindows()
 
-    alert_producer.close()
-
     return events
 
 
 DB_CONFIG = {
     "host": os.getenv("COSMOS_POSTGRES_HOST"),
     "port": os.getenv("COSMOS_POSTGRES_PORT"),
-    "database": os.getenv("COSMOS_POSTGRES_DB"),
+    "dbname": os.getenv("COSMOS_POSTGRES_DB"),
     "user": os.getenv("COSMOS_POSTGRES_USER"),
     "password": os.getenv("COSMOS_POSTGRES_PASSWORD")
 }
 
 INSERT_SQL = """
     INSERT INTO vehicle_events (vehicle_id, vehicle_type, lane, speed_kmh, five_min_bin, video_id)
-    VALUES %s;
+    VALUES (%s, %s, %s, %s, %s, %s);
 """
 
+COPY_SQL = """
+    COPY vehicle_events (vehicle_id, vehicle_type, lane, speed_kmh, five_min_bin, video_id)
+    FROM STDIN (FORMAT BINARY)
+"""
+
+# Below this size the COPY setup cost isn't worth it; use a plain batched INSERT
+COPY_MIN_EVENTS = 100
+
 def batch_insert_vehicle_events(events):
-    with psycopg2.connect(**DB_CONFIG) as conn:
+    with psycopg.connect(**DB_CONFIG) as conn:
         with conn.cursor() as cur:
-            execute_values(cur, INSERT_SQL, events)
+            if len(events) >= COPY_MIN_EVENTS:
+                # Binary COPY skips the SQL parser and sends tuples in the
+                # native wire format, which ingests far faster at scale.
+                # Binary format does no server-side coercion, so the declared
+                # types and the Python values must match the columns exactly:
+                # vehicle_id/video_id are UUID, speed_kmh is NUMERIC(6,2)
+                with cur.copy(COPY_SQL) as copy:
+                    copy.set_types(['uuid', 'text', 'text', 'numeric', 'int4', 'uuid'])
+                    for vehicle_id, vehicle_type, lane, speed_kmh, five_min_bin, video_id in events:
+                        copy.write_row((uuid.UUID(vehicle_id), vehicle_type, lane,
+                                        Decimal(f"{speed_kmh:.2f}"), five_min_bin, uuid.UUID(video_id)))
+            else:
+                cur.executemany(INSERT_SQL, events)
             logger.info("Batch inserted successfully.")
 
 
@@ -391,7 +683,7 @@ def main():
     )
 
     consumer = EventHubConsumerClient.from_connection_string(
-        conn_str=os.getenv("EVENT_HUB_CONNECTION_STRING"),
+        conn_str=EVENT_HUB_CONNECTION_STRING,
         eventhub_name=os.getenv("SEGMENTS_EVENT_HUB_NAME"),
         consumer_group=os.getenv("DEFAULT_CONSUMER_GROUP"),
         checkpoint_store=checkpoint_store
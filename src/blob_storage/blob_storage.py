@@ -1,39 +1,216 @@
 # src/blob_storage/blob_service.py
+import asyncio
+import functools
 import os
 import logging
+import time
+from azure.core.exceptions import HttpResponseError, ResourceExistsError, ServiceRequestError
+from azure.core.pipeline.transport import AioHttpTransport
 from azure.storage.blob import BlobServiceClient, ContentSettings
 from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
 
+
+@functools.lru_cache(maxsize=32)
+def _content_settings(content_type):
+    """Return a shared ContentSettings instance for a content type
+
+    The settings object is immutable for our purposes, so one instance per
+    content type is enough instead of a fresh allocation on every upload.
+
+    Args:
+        content_type (str): MIME type for the blob
+
+    Returns:
+        ContentSettings: Cached settings carrying the content type
+    """
+    return ContentSettings(content_type=content_type)
+
 class BlobStorageService:
     """Service for interacting with Azure Blob Storage"""
     
-    def __init__(self, connection_string):
+    def __init__(self, connection_string, max_concurrency=8, max_block_size=8 * 1024 * 1024):
         """Initialize the BlobStorageService with the Azure connection string
-        
+
+        The SDK defaults transfer one 4 MiB chunk at a time, which leaves most
+        of the available bandwidth unused for video-sized blobs.
+
         Args:
             connection_string (str): Azure Storage connection string
+            max_concurrency (int): Parallel connections per blob transfer
+            max_block_size (int): Block size in bytes for chunked uploads
         """
         self.connection_string = connection_string
-        self.blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-        self.async_blob_service_client = None  # Lazy initialization for async client
-    
+        self.max_concurrency = max_concurrency
+        self._transfer_options = {
+            'max_block_size': max_block_size,
+            'max_single_put_size': 64 * 1024 * 1024,  # Small blobs go out as one PUT
+        }
+        # One shared aiohttp-backed transport: connections are reused across
+        # every upload/download instead of re-handshaking per call. The pool
+        # size stays at aiohttp's default (100 connections); sizing it would
+        # require handing the transport a session built on a running loop.
+        self.async_blob_service_client = AsyncBlobServiceClient.from_connection_string(
+            connection_string,
+            transport=AioHttpTransport(connection_timeout=20, read_timeout=60),
+            **self._transfer_options)
+        # The sync client (and its requests pool) is built only if a sync
+        # caller actually shows up; async-only users never pay for it
+        self._sync_blob_service_client = None
+        self._known_containers = set()  # Containers already confirmed to exist
+
+    @property
+    def blob_service_client(self):
+        """Sync BlobServiceClient, created lazily on first use
+
+        Returns:
+            BlobServiceClient: The shared sync client
+        """
+        if self._sync_blob_service_client is None:
+            self._sync_blob_service_client = BlobServiceClient.from_connection_string(
+                self.connection_string, **self._transfer_options)
+        return self._sync_blob_service_client
+
+    async def aclose(self):
+        """Close the async client and its pooled connections
+
+        Returns:
+            None
+        """
+        await self.async_blob_service_client.close()
+
+    # Candidate errors for a retry; _is_transient narrows HttpResponseError
+    # down to the actually-transient statuses. Retries are safe because every
+    # upload passes overwrite=True and stream payloads are rewound first.
+    _RETRYABLE = (ServiceRequestError, HttpResponseError, asyncio.TimeoutError)
+
+    @staticmethod
+    def _is_transient(error):
+        """Whether a storage error is worth retrying
+
+        Args:
+            error (Exception): Error raised by the storage operation
+
+        Returns:
+            bool: True for connection errors, timeouts and 429/5xx responses;
+                False for permanent failures like 403/404/409
+        """
+        if isinstance(error, HttpResponseError):
+            return error.status_code == 429 or (error.status_code or 0) >= 500
+        return True
+
+    @staticmethod
+    def _rewind(content):
+        """Rewind a stream payload so a retry resends it from the start
+
+        A failed attempt may have partially consumed a file-like payload;
+        resending without rewinding would commit a truncated blob.
+
+        Args:
+            content: Upload payload (bytes or file-like object)
+
+        Returns:
+            bool: True if the payload is safe to send again
+        """
+        if not hasattr(content, 'seek'):
+            return True  # bytes-like payloads are never consumed
+        try:
+            content.seek(0)
+            return True
+        except (OSError, ValueError):
+            return False  # non-seekable stream: a resend would be truncated
+
+    async def _with_retry(self, coro_fn, content=None, attempts=3):
+        """Run an async upload with exponential backoff on transient errors
+
+        Args:
+            coro_fn (callable): Zero-argument callable returning an awaitable
+            content: The upload payload, rewound before each retry
+            attempts (int): Total attempts before the error propagates
+
+        Returns:
+            Any: Whatever the operation returns
+        """
+        for attempt in range(attempts):
+            try:
+                return await coro_fn()
+            except self._RETRYABLE as error:
+                if attempt == attempts - 1 or not self._is_transient(error):
+                    raise
+                if content is not None and not self._rewind(content):
+                    raise
+                logging.warning(f"Transient upload error, retrying in {2 ** attempt}s")
+                await asyncio.sleep(2 ** attempt)
+
+    def _with_retry_sync(self, fn, content=None, attempts=3):
+        """Sync counterpart of _with_retry
+
+        Args:
+            fn (callable): Zero-argument callable to run
+            content: The upload payload, rewound before each retry
+            attempts (int): Total attempts before the error propagates
+
+        Returns:
+            Any: Whatever the operation returns
+        """
+        for attempt in range(attempts):
+            try:
+                return fn()
+            except self._RETRYABLE as error:
+                if attempt == attempts - 1 or not self._is_transient(error):
+                    raise
+                if content is not None and not self._rewind(content):
+                    raise
+                logging.warning(f"Transient upload error, retrying in {2 ** attempt}s")
+                time.sleep(2 ** attempt)
+
     def create_container_if_not_exists(self, container_name):
         """Create a container if it doesn't already exist
-        
+
+        Containers confirmed to exist are remembered, so repeat calls on the
+        upload path skip the network round-trip entirely.
+
         Args:
             container_name (str): Name of the container to create
-            
+
         Returns:
             ContainerClient: Azure container client
         """
         container_client = self.blob_service_client.get_container_client(container_name)
-        
-        if not container_client.exists():
+
+        if container_name in self._known_containers:
+            return container_client
+
+        try:
             logging.info(f"Creating container: {container_name}")
             container_client.create_container()
-        
+        except ResourceExistsError:
+            pass
+
+        self._known_containers.add(container_name)
         return container_client
-    
+
+    async def _ensure_container_async(self, container_name):
+        """Create a container via the async client if it doesn't already exist
+
+        Async counterpart of create_container_if_not_exists so the event loop
+        is never blocked by a sync HTTP call.
+
+        Args:
+            container_name (str): Name of the container to create
+        """
+        if container_name in self._known_containers:
+            return
+
+        async_container_client = self.async_blob_service_client.get_container_client(container_name)
+
+        try:
+            logging.info(f"Creating container: {container_name}")
+            await async_container_client.create_container()
+        except ResourceExistsError:
+            pass
+
+        self._known_containers.add(container_name)
+
     async def upload_video(self, container_name, blob_name, content, content_type="video/mp4"):
         """Upload a video file to Azure Blob Storage (async version)
         
@@ -46,28 +223,24 @@ class BlobStorageService:
         Returns:
             str: URL of the uploaded blob
         """
-        # Create container if it doesn't exist (using sync client)
-        self.create_container_if_not_exists(container_name)
-        
-        # Initialize async client if needed
-        if not self.async_blob_service_client:
-            self.async_blob_service_client = AsyncBlobServiceClient.from_connection_string(self.connection_string)
-        
+        # Create container if it doesn't exist, without blocking the event loop
+        await self._ensure_container_async(container_name)
+
         # Get async container and blob clients
         async_container_client = self.async_blob_service_client.get_container_client(container_name)
         async_blob_client = async_container_client.get_blob_client(blob_name)
         
         # Set the content type for the blob
-        content_settings = ContentSettings(content_type=content_type)
+        content_settings = _content_settings(content_type)
         
         logging.info(f"Uploading blob: {blob_name} to container: {container_name}")
-        await async_blob_client.upload_blob(content, content_settings=content_settings, overwrite=True)
-        
-        # Construct the URL (we can't easily get it from the async client)
-        account_name = self.blob_service_client.account_name
-        url = f"https://{account_name}.blob.core.windows.net/{container_name}/{blob_name}"
-        
-        return url
+        await self._with_retry(
+            lambda: async_blob_client.upload_blob(content, content_settings=content_settings,
+                                                  max_concurrency=self.max_concurrency, overwrite=True),
+            content=content)
+
+        # The client already knows its own URL, including custom endpoints
+        return async_blob_client.url
     
     # Add a sync version for non-async contexts
     def upload_video_sync(self, container_name, blob_name, content, content_type="video/mp4"):
@@ -86,32 +259,83 @@ class BlobStorageService:
         blob_client = container_client.get_blob_client(blob_name)
         
         # Set the content type for the blob
-        content_settings = ContentSettings(content_type=content_type)
+        content_settings = _content_settings(content_type)
         
         logging.info(f"Uploading blob: {blob_name} to container: {container_name}")
-        blob_client.upload_blob(content, content_settings=content_settings, overwrite=True)
-        
+        self._with_retry_sync(
+            lambda: blob_client.upload_blob(content, content_settings=content_settings,
+                                            max_concurrency=self.max_concurrency, overwrite=True),
+            content=content)
+
         return blob_client.url
     
-    async def download_video(self, container_name, blob_name):
+    async def upload_many(self, container_name, items, content_type="video/mp4", concurrency=16):
+        """Upload many small blobs concurrently (async version)
+
+        Uploading blobs one await at a time pays a full HTTPS round-trip per
+        file; this overlaps the round-trips while the semaphore keeps the task
+        count bounded so large lists don't exhaust sockets.
+
+        Args:
+            container_name (str): Name of the container
+            items (iterable): (blob_name, content) pairs to upload
+            content_type (str): MIME type applied to every blob
+            concurrency (int): Maximum number of uploads in flight at once
+
+        Returns:
+            List[str]: URLs of the uploaded blobs, in input order
+        """
+        items = list(items)
+        await self._ensure_container_async(container_name)
+
+        async_container_client = self.async_blob_service_client.get_container_client(container_name)
+        content_settings = _content_settings(content_type)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def upload_one(blob_name, content):
+            async with semaphore:
+                async_blob_client = async_container_client.get_blob_client(blob_name)
+                await self._with_retry(
+                    lambda: async_blob_client.upload_blob(content, content_settings=content_settings,
+                                                          max_concurrency=self.max_concurrency, overwrite=True),
+                    content=content)
+                return async_blob_client.url
+
+        logging.info(f"Uploading {len(items)} blobs to container: {container_name}")
+        return await asyncio.gather(*(upload_one(name, content) for name, content in items))
+
+    async def download_video(self, container_name, blob_name, dest=None):
         """Download a video file from Azure Blob Storage (async version)
-        
+
+        The blob is streamed chunk by chunk instead of materialized in one
+        readall() call: with a dest file object memory stays at one chunk,
+        and without one the chunks fill a single preallocated buffer.
+
         Args:
             container_name (str): Name of the container
             blob_name (str): Name of the blob
-            
+            dest (file-like, optional): Binary writable object to stream chunks into
+
         Returns:
-            bytes: Content of the blob
+            bytearray: Content of the blob, or None when dest was provided
         """
-        # Initialize async client if needed
-        if not self.async_blob_service_client:
-            self.async_blob_service_client = AsyncBlobServiceClient.from_connection_string(self.connection_string)
-        
         # Get async container and blob clients
         async_container_client = self.async_blob_service_client.get_container_client(container_name)
         async_blob_client = async_container_client.get_blob_client(blob_name)
-        
+
         logging.info(f"Downloading blob: {blob_name} from container: {container_name}")
-        download = await async_blob_client.download_blob()
-        
-        return await download.readall()
\ No newline at end of file
+        download = await async_blob_client.download_blob(max_concurrency=self.max_concurrency)
+
+        if dest is not None:
+            async for chunk in download.chunks():
+                dest.write(chunk)
+            return None
+
+        # Size is known up-front, so fill one preallocated buffer chunk by chunk
+        buffer = bytearray(download.size)
+        offset = 0
+        async for chunk in download.chunks():
+            buffer[offset:offset + len(chunk)] = chunk
+            offset += len(chunk)
+
+        return buffer
\ No newline at end of file
@@ -1,29 +1,61 @@
 import os
 from dotenv import load_dotenv
 
-# Load environment variables from .env file if it exists
-load_dotenv()
-
-class Config:
-    """Configuration for the traffic monitoring system"""
-    
+# Environment variable specs: name -> (default, converter). Values are
+# resolved lazily on first attribute access, so importing this module does
+# no filesystem I/O and tests can still override the environment afterwards.
+_ENV_SPECS = {
     # Azure Storage
-    AZURE_STORAGE_CONNECTION_STRING = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
-    RAW_VIDEOS_CONTAINER = os.getenv('RAW_VIDEOS_CONTAINER', 'raw-footage')
-    PROCESSED_SEGMENTS_CONTAINER = os.getenv('PROCESSED_SEGMENTS_CONTAINER', 'processed-videos')
-    
+    'AZURE_STORAGE_CONNECTION_STRING': (None, None),
+    'RAW_VIDEOS_CONTAINER': ('raw-footage', None),
+    'PROCESSED_SEGMENTS_CONTAINER': ('processed-videos', None),
+
     # Event Hub
-    EVENT_HUB_CONNECTION_STRING = os.getenv('EVENT_HUB_CONNECTION_STRING')
-    EVENT_HUB_NAME = os.getenv('EVENT_HUB_NAME', 'video-segments')
-    
+    'EVENT_HUB_CONNECTION_STRING': (None, None),
+    'EVENT_HUB_NAME': ('video-segments', None),
+
     # Cosmos DB
-    COSMOS_DB_CONNECTION_STRING = os.getenv('COSMOS_DB_CONNECTION_STRING')
-    COSMOS_DB_NAME = os.getenv('COSMOS_DB_NAME', 'traffic-monitoring')
-    COSMOS_DB_CONTAINER = os.getenv('COSMOS_DB_CONTAINER', 'vehicle-events')
-    
+    'COSMOS_DB_CONNECTION_STRING': (None, None),
+    'COSMOS_DB_NAME': ('traffic-monitoring', None),
+    'COSMOS_DB_CONTAINER': ('vehicle-events', None),
+
     # Video Processing
-    SEGMENT_DURATION_SECONDS = int(os.getenv('SEGMENT_DURATION_SECONDS', '120'))  # 2 minutes
-    
+    'SEGMENT_DURATION_SECONDS': ('120', int),  # 2 minutes
+}
+
+_dotenv_loaded = False
+
+
+class _ConfigMeta(type):
+    """Resolves Config attributes from the environment on first access"""
+
+    def __getattr__(cls, name):
+        if name not in _ENV_SPECS:
+            raise AttributeError(name)
+
+        # Load the .env file once, the first time any setting is read
+        global _dotenv_loaded
+        if not _dotenv_loaded:
+            load_dotenv()
+            _dotenv_loaded = True
+
+        default, convert = _ENV_SPECS[name]
+        value = os.getenv(name, default)
+        if convert is not None and value is not None:
+            value = convert(value)
+
+        # Cache on the class so later reads bypass __getattr__ entirely
+        setattr(cls, name, value)
+        return value
+
+
+class Config(metaclass=_ConfigMeta):
+    """Configuration for the traffic monitoring system
+
+    Settings keep their Config.ATTRIBUTE access style but are read from the
+    environment lazily via _ConfigMeta instead of at class-definition time.
+    """
+
     @classmethod
     def validate(cls):
         """Validate that all required configuration is present"""
@@ -31,11 +63,11 @@ class Config:
             ('AZURE_STORAGE_CONNECTION_STRING', 'Azure Blob Storage connection string'),
             ('EVENT_HUB_CONNECTION_STRING', 'Event Hub connection string')
         ]
-        
+
         missing = []
         for var_name, description in required_vars:
             if not getattr(cls, var_name):
                 missing.append(f"{var_name} ({description})")
-        
+
         if missing:
-            raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
\ No newline at end of file
+            raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
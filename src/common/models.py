@@ -1,24 +1,38 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
-from datetime import datetime
-import uuid
+from dataclasses import dataclass, field
+import secrets
+import time
 
-class VideoMetadata(BaseModel):
+# Plain slotted dataclasses: these are built once per segment, thousands per
+# video, and need no validation - construction is ~ns-scale and instances
+# carry no __dict__.
+
+def _new_id():
+    # One urandom read plus a C-level hex encode: same 128 bits of entropy
+    # as a uuid4 without the Python-side bit shuffling and formatting
+    return secrets.token_hex(16)
+
+
+@dataclass(slots=True)
+class VideoMetadata:
     """Metadata for a video file"""
-    video_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     blob_name: str
     container_name: str
     content_length: int
+    video_id: str = field(default_factory=_new_id)
     content_type: str = "video/mp4"
-    upload_time: datetime = Field(default_factory=datetime.utcnow)
+    # Epoch nanoseconds: cheaper to capture than a datetime, serializes as a
+    # plain integer, and converts to wall-clock form only at display time
+    upload_time_ns: int = field(default_factory=time.time_ns)
+
 
-class VideoSegment(BaseModel):
+@dataclass(slots=True)
+class VideoSegment:
     """Information about a video segment"""
-    segment_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     video_id: str
     segment_number: int
     blob_name: str
     container_name: str
     start_time: int  # Start time in seconds from the beginning of the original video
     duration: int  # Duration in seconds
+    segment_id: str = field(default_factory=_new_id)
     processed: bool = False
@@ -1,105 +1,229 @@
+import asyncio
 import json
 import logging
+import time
+import zlib
+from collections import defaultdict
 from typing import Dict, List, Any
 
-from azure.eventhub import EventHubProducerClient, EventHubConsumerClient, EventData
+from azure.eventhub import EventData
+from azure.eventhub.aio import EventHubProducerClient, EventHubConsumerClient
 from azure.eventhub.extensions.checkpointstoreblobaio import BlobCheckpointStore
 
+# orjson serializes straight to bytes several times faster than stdlib json;
+# fall back to json so the service works without the optional dependency
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj)
+
+    def _loads(data):
+        return orjson.loads(data)
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+
+    def _loads(data):
+        return json.loads(data)
+
+
+# Approximate AMQP framing (and small property map) cost per event; used to
+# budget batch size without letting try_add measure an event twice
+_EVENT_OVERHEAD_BYTES = 64
+
+# Event lists at least this long are serialized in a worker thread so the
+# encode pass doesn't stall other coroutines on the event loop
+_ENCODE_OFFLOAD_THRESHOLD = 1000
+
+
 class EventHubService:
     """Service for interacting with Azure Event Hub"""
-    
+
     def __init__(self, connection_string: str, eventhub_name: str):
         """Initialize the EventHubService
-        
+
         Args:
             connection_string (str): Event Hub connection string
             eventhub_name (str): Event Hub name
         """
         self.connection_string = connection_string
         self.eventhub_name = eventhub_name
-    
+        self._producer = None
+        self._producer_lock = asyncio.Lock()
+
+    async def _get_producer(self):
+        """Create the shared producer client on first use and reuse it afterwards
+
+        Each from_connection_string call pays a full TCP+TLS+AMQP handshake, so
+        the producer is cached for the lifetime of the service.
+
+        Returns:
+            EventHubProducerClient: The cached async producer client
+        """
+        if self._producer is None:
+            async with self._producer_lock:
+                if self._producer is None:
+                    self._producer = EventHubProducerClient.from_connection_string(
+                        conn_str=self.connection_string,
+                        eventhub_name=self.eventhub_name
+                    )
+        return self._producer
+
+    async def close(self):
+        """Close the shared producer client if it was created
+
+        Returns:
+            None
+        """
+        if self._producer is not None:
+            await self._producer.close()
+            self._producer = None
+
     async def send_event(self, event_data: Dict[str, Any], properties: Dict[str, Any] = None):
         """Send a single event to Event Hub
-        
+
         Args:
             event_data (Dict[str, Any]): Event data to send
             properties (Dict[str, Any], optional): Event properties for filtering
-            
+
         Returns:
             None
         """
-        producer = EventHubProducerClient.from_connection_string(
-            conn_str=self.connection_string,
-            eventhub_name=self.eventhub_name
-        )
-        
-        async with producer:
-            # Create a batch
-            event_data_batch = await producer.create_batch()
-            
-            # Create event
-            event = EventData(json.dumps(event_data).encode('utf-8'))
-            
-            # Add properties if provided
-            if properties:
-                event.properties = properties
-            
-            # Add event to batch
-            if not event_data_batch.try_add(event):
-                raise ValueError("Event too large for batch")
-            
-            # Send batch
-            await producer.send_batch(event_data_batch)
-    
-    async def send_events(self, events: List[Dict[str, Any]], property_key: str = None):
+        producer = await self._get_producer()
+
+        # Create a batch
+        event_data_batch = await producer.create_batch()
+
+        # Create event
+        event = EventData(_dumps(event_data))
+
+        # Add properties if provided
+        if properties:
+            event.properties = properties
+
+        # Add event to batch
+        if not event_data_batch.try_add(event):
+            raise ValueError("Event too large for batch")
+
+        # Send batch
+        await producer.send_batch(event_data_batch)
+
+    async def send_events(self, events: List[Dict[str, Any]], property_key: str = None,
+                          partitions: int = 8):
         """Send multiple events to Event Hub
-        
+
+        Payloads are serialized up-front in one pass, then sharded across
+        partition keys and sent concurrently - a single implicit partition
+        caps throughput at one partition's quota no matter how many the hub
+        has. Events sharing a property_key value land on the same shard, so
+        per-key ordering is preserved.
+
         Args:
             events (List[Dict[str, Any]]): List of event data to send
             property_key (str, optional): Key to use for properties from event data
-            
+            partitions (int): Number of partition-key shards to spread sends over
+
         Returns:
             None
         """
         if not events:
             return
-        
-        producer = EventHubProducerClient.from_connection_string(
-            conn_str=self.connection_string,
-            eventhub_name=self.eventhub_name
-        )
-        
-        async with producer:
-            # Create a batch
-            event_data_batch = await producer.create_batch()
-            
-            for event_data in events:
-                # Create event
-                event = EventData(json.dumps(event_data).encode('utf-8'))
-                
-                # Add properties if key provided
-                if property_key and property_key in event_data:
-                    event.properties = {property_key: event_data[property_key]}
-                
-                # Add event to batch, if it's full then send and create a new one
-                if not event_data_batch.try_add(event):
-                    await producer.send_batch(event_data_batch)
-                    event_data_batch = await producer.create_batch()
+
+        producer = await self._get_producer()
+
+        # Pre-encode every payload before touching the batches; big lists are
+        # encoded off the event loop so in-flight sends and receives keep moving
+        if len(events) >= _ENCODE_OFFLOAD_THRESHOLD:
+            payloads = await asyncio.to_thread(lambda: [_dumps(event_data) for event_data in events])
+        else:
+            payloads = [_dumps(event_data) for event_data in events]
+
+        # Hoist the property_key checks out of the per-event loops
+        use_props = property_key is not None
+
+        # Shard by the property value when there is one, otherwise spread
+        # events evenly by position
+        groups = defaultdict(list)
+        for index, (event_data, payload) in enumerate(zip(events, payloads)):
+            value = event_data.get(property_key) if use_props else None
+            if value is not None:
+                # crc32 is stable across processes, unlike hash() whose string
+                # seed is salted per run - same key, same shard, every restart
+                shard = zlib.crc32(str(value).encode()) % partitions
+            else:
+                shard = index % partitions
+            groups[shard].append((event_data, payload))
+
+        # Bound concurrent sends so we don't saturate the AMQP link
+        semaphore = asyncio.Semaphore(8)
+
+        async def send_group(shard, group):
+            async with semaphore:
+                event_data_batch = await producer.create_batch(partition_key=str(shard))
+                max_size = event_data_batch.max_size_in_bytes
+                current_size = 0
+
+                for event_data, payload in group:
+                    event_size = len(payload) + _EVENT_OVERHEAD_BYTES
+
+                    # Flush before the tracked budget overflows, so try_add
+                    # rarely measures an event only to reject it
+                    if current_size and current_size + event_size > max_size:
+                        await producer.send_batch(event_data_batch)
+                        event_data_batch = await producer.create_batch(partition_key=str(shard))
+                        current_size = 0
+
+                    event = EventData(payload)
+
+                    # Add properties if key provided (single .get instead of a
+                    # membership test plus an indexed lookup)
+                    if use_props:
+                        value = event_data.get(property_key)
+                        if value is not None:
+                            event.properties = {property_key: value}
+
+                    # The budget is an estimate (properties and framing can
+                    # exceed the per-event allowance); if the real size still
+                    # overflows, flush and retry in a fresh batch before
+                    # declaring the event oversized
                     if not event_data_batch.try_add(event):
-                        raise ValueError("Event too large for batch")
-            
-            # Send any remaining events
-            if len(event_data_batch) > 0:
-                await producer.send_batch(event_data_batch)
+                        if len(event_data_batch) > 0:
+                            await producer.send_batch(event_data_batch)
+                            event_data_batch = await producer.create_batch(partition_key=str(shard))
+                            current_size = 0
+                        if not event_data_batch.try_add(event):
+                            raise ValueError("Event too large for batch")
+                    current_size += event_size
+
+                # Send any remaining events
+                if len(event_data_batch) > 0:
+                    await producer.send_batch(event_data_batch)
+
+        await asyncio.gather(*(send_group(shard, group) for shard, group in groups.items()))
     
-    async def process_events(self, callback, checkpoint_store_connection_string: str, consumer_group: str = "$Default"):
+    async def process_events(self, callback, checkpoint_store_connection_string: str, consumer_group: str = "$Default",
+                             checkpoint_every: int = 100, checkpoint_interval: float = 5.0):
         """Process events from Event Hub with checkpointing
-        
+
+        Events are received in batches (with the client prefetching ahead) so
+        dispatch overhead is paid per batch rather than per event. The
+        callback gets two parallel lists - decoded event bodies and their
+        properties - covering one batch.
+
+        Every checkpoint is a blob write, so checkpointing each event makes
+        storage latency the receive bottleneck. Checkpoints are instead taken
+        per partition every checkpoint_every events or checkpoint_interval
+        seconds, whichever comes first; on restart at most that window of
+        events is redelivered.
+
         Args:
-            callback (callable): Callback function for processing events
+            callback (callable): Coroutine called with (event_data_list, properties_list)
             checkpoint_store_connection_string (str): Storage connection string for checkpointing
             consumer_group (str, optional): Event Hub consumer group
-            
+            checkpoint_every (int): Events per partition between checkpoints
+            checkpoint_interval (float): Maximum seconds between checkpoints
+
         Returns:
             None
         """
@@ -116,17 +240,30 @@ class EventHubService:
             eventhub_name=self.eventhub_name,
             checkpoint_store=checkpoint_store
         )
-        
-        async def on_event(partition_context, event):
-            # Extract data from event
-            event_data = json.loads(event.body_as_str())
-            
-            # Process the event using the callback
-            await callback(event_data, event.properties)
-            
-            # Update checkpoint
-            await partition_context.update_checkpoint(event)
-        
-        # Start receiving events
+
+        # Per-partition (event count, last checkpoint time) state
+        checkpoint_state = {}
+
+        async def on_event_batch(partition_context, events):
+            if not events:
+                return
+
+            # Extract data from events without a UTF-8 decode round-trip
+            await callback([_loads(b''.join(event.body)) for event in events],
+                           [event.properties for event in events])
+
+            # Checkpoint the last event every N events or T seconds per partition
+            count, last_checkpoint = checkpoint_state.get(partition_context.partition_id, (0, time.monotonic()))
+            count += len(events)
+            now = time.monotonic()
+            if count >= checkpoint_every or now - last_checkpoint > checkpoint_interval:
+                await partition_context.update_checkpoint(events[-1])
+                checkpoint_state[partition_context.partition_id] = (0, now)
+            else:
+                checkpoint_state[partition_context.partition_id] = (count, last_checkpoint)
+
+        # Start receiving events; prefetch keeps the link well ahead of the
+        # batches handed to the callback
         async with consumer:
-            await consumer.receive(on_event)
\ No newline at end of file
+            await consumer.receive_batch(on_event_batch, max_batch_size=300, max_wait_time=1,
+                                         prefetch=500)
\ No newline at end of file